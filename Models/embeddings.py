@@ -1,6 +1,219 @@
-from langchain_huggingface import HuggingFaceEndpointEmbeddings
+import asyncio
+import os
+from typing import List
+import httpx
+import numpy as np
+import torch
+from langchain_core.embeddings import Embeddings
+from sentence_transformers import SentenceTransformer
 
-def get_embeddings():
-    hugmb = HuggingFaceEndpointEmbeddings(model = "sentence-transformers/all-MiniLM-L6-v2")
+# Optional: INT8 ONNX Runtime backend
+try:
+    from optimum.onnxruntime import ORTModelForFeatureExtraction, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    from transformers import AutoTokenizer
+except ImportError:
+    ORTModelForFeatureExtraction = None
+
+MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+ONNX_INT8_DIR = "onnx_mini_int8"
+ONNX_INT8_FILE = "model_quantized.onnx"
+# all-MiniLM-L6-v2 truncates at 256 tokens in sentence-transformers
+MAX_SEQ_LENGTH = 256
+
+
+def normalize(vectors) -> np.ndarray:
+    # unit length vectors, so the FAISS inner product index gives cosine similarity
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+class LocalEmbeddings(Embeddings):
+    """Runs the sentence-transformers model in-process instead of calling the HF endpoint"""
+
+    def __init__(self, model_name: str = MODEL_NAME, batch_size: int = 64):
+        self.device = 'cuda' if torch.cuda.is_available() else 'cpu'
+        self.model = SentenceTransformer(model_name, device=self.device)
+        # names the vector space, e.g. for keying cached embeddings
+        self.model_id = f"sentence-transformers:{model_name}"
+        if self.device == 'cuda':
+            # fp16 weights halve memory traffic on the GPU
+            self.model.half()
+        self.batch_size = batch_size
+
+    def _encode(self, texts: List[str]):
+        with torch.inference_mode():
+            vectors = self.model.encode(
+                texts,
+                batch_size=self.batch_size,
+                convert_to_numpy=True,
+                show_progress_bar=False,
+            )
+        return normalize(vectors)
+
+    def embed_documents_np(self, texts: List[str]) -> np.ndarray:
+        """Same as embed_documents but returns one contiguous (N, dim) float32 array"""
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+
+        # sort by length so each batch has similar sized texts (less padding),
+        # then put the vectors back in the original order
+        order = np.argsort([len(t) for t in texts], kind='stable')
+        vectors = self._encode([texts[i] for i in order])
+
+        result = np.empty_like(vectors)
+        result[order] = vectors
+        return result
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embed_documents_np(texts).tolist()
+
+    async def aembed_documents_np(self, texts: List[str]) -> np.ndarray:
+        # runs the model off the event loop, keeping the array as is
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.embed_documents_np, texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._encode([text])[0].tolist()
+
+
+class TEIEmbeddings(Embeddings):
+    """
+    Client for a Text-Embeddings-Inference (or Infinity) server, which does
+    dynamic batching on its side. Run the sidecar with:
+
+        docker run -p 8080:80 ghcr.io/huggingface/text-embeddings-inference:cpu-latest \\
+            --model-id sentence-transformers/all-MiniLM-L6-v2
+    """
+
+    # embedding happens over the network, so concurrent batches pay off
+    remote = True
+
+    def __init__(self, base_url: str, batch_size: int = 32, timeout: float = 60.0):
+        self.url = base_url.rstrip('/') + '/embed'
+        self.batch_size = batch_size
+        # pooled clients, reused for every request
+        self.client = httpx.Client(timeout=timeout)
+        self.async_client = httpx.AsyncClient(http2=True, timeout=timeout)
+        self.model_id = f"tei:{self._served_model(base_url)}"
+
+    def _served_model(self, base_url: str) -> str:
+        # TEI reports the model it serves at /info; fall back to the URL
+        try:
+            response = self.client.get(base_url.rstrip('/') + '/info')
+            response.raise_for_status()
+            return response.json()["model_id"]
+        except Exception:
+            return base_url
+
+    def _batches(self, texts: List[str]):
+        return [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+
+    def embed_documents_np(self, texts: List[str]) -> np.ndarray:
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+
+        vectors = []
+        for batch in self._batches(texts):
+            response = self.client.post(self.url, json={"inputs": batch, "normalize": True})
+            response.raise_for_status()
+            vectors.append(normalize(response.json()))
+        return np.vstack(vectors)
 
-    return hugmb
\ No newline at end of file
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embed_documents_np(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    async def _aembed_batch(self, batch: List[str]) -> np.ndarray:
+        response = await self.async_client.post(self.url, json={"inputs": batch, "normalize": True})
+        response.raise_for_status()
+        return normalize(response.json())
+
+    async def aembed_documents_np(self, texts: List[str]) -> np.ndarray:
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+
+        results = await asyncio.gather(*[self._aembed_batch(b) for b in self._batches(texts)])
+        return np.vstack(results)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return (await self.aembed_documents_np(texts)).tolist()
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return (await self._aembed_batch([text]))[0].tolist()
+
+
+class ONNXEmbeddings(Embeddings):
+    """
+    INT8-quantized ONNX Runtime version of the model for CPU inference.
+    The model is exported and quantized into `onnx_dir` on first use.
+    """
+
+    def __init__(self, model_name: str = MODEL_NAME, onnx_dir: str = ONNX_INT8_DIR, batch_size: int = 64):
+        if ORTModelForFeatureExtraction is None:
+            raise ImportError("Install optimum[onnxruntime] for the ONNX embeddings backend")
+
+        # the quantized model is written last, so it only exists after a complete export
+        if not os.path.isfile(os.path.join(onnx_dir, ONNX_INT8_FILE)):
+            AutoTokenizer.from_pretrained(model_name).save_pretrained(onnx_dir)
+            exported = ORTModelForFeatureExtraction.from_pretrained(model_name, export=True)
+            quantizer = ORTQuantizer.from_pretrained(exported)
+            qconfig = AutoQuantizationConfig.avx512_vnni(is_static=False, per_channel=False)
+            quantizer.quantize(save_dir=onnx_dir, quantization_config=qconfig)
+
+        self.tokenizer = AutoTokenizer.from_pretrained(onnx_dir)
+        self.model = ORTModelForFeatureExtraction.from_pretrained(onnx_dir, file_name=ONNX_INT8_FILE)
+        self.model_id = f"onnx-int8:{model_name}"
+        self.batch_size = batch_size
+
+    def _encode(self, texts: List[str]):
+        inputs = self.tokenizer(
+            texts, padding=True, truncation=True, max_length=MAX_SEQ_LENGTH, return_tensors="pt"
+        )
+        with torch.inference_mode():
+            token_embeddings = self.model(**inputs).last_hidden_state
+
+        # mean pooling over real tokens, then L2 normalize (same as sentence-transformers)
+        mask = inputs["attention_mask"].unsqueeze(-1).to(token_embeddings.dtype)
+        summed = (token_embeddings * mask).sum(dim=1)
+        pooled = summed / mask.sum(dim=1).clamp(min=1e-9)
+        return torch.nn.functional.normalize(pooled, p=2, dim=1).numpy()
+
+    def embed_documents_np(self, texts: List[str]) -> np.ndarray:
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+
+        order = np.argsort([len(t) for t in texts], kind='stable')
+        batches = [
+            self._encode([texts[i] for i in order[start:start + self.batch_size]])
+            for start in range(0, len(order), self.batch_size)
+        ]
+
+        result = np.empty((len(texts), batches[0].shape[1]), dtype=np.float32)
+        result[order] = np.vstack(batches)
+        return result
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embed_documents_np(texts).tolist()
+
+    async def aembed_documents_np(self, texts: List[str]) -> np.ndarray:
+        # runs the model off the event loop, keeping the array as is
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.embed_documents_np, texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._encode([text])[0].tolist()
+
+
+def get_embeddings():
+    # TEI_URL=http://tei:8080 switches to the embedding server
+    tei_url = os.getenv("TEI_URL")
+    if tei_url:
+        return TEIEmbeddings(tei_url)
+    # EMBEDDINGS_BACKEND=onnx uses the INT8 ONNX model on CPU
+    if os.getenv("EMBEDDINGS_BACKEND", "").lower() == "onnx":
+        return ONNXEmbeddings()
+    return LocalEmbeddings()
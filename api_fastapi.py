@@ -6,7 +6,7 @@ This API supports:
 - Uploading documents (NEW: txt, docx, pdf)
 
 Installation:
-    pip install fastapi uvicorn python-multipart python-docx PyPDF2
+    pip install fastapi uvicorn python-multipart python-docx pymupdf aiofiles
 
 Run:
     uvicorn api_with_upload:app --reload
@@ -17,19 +17,16 @@ from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import List, Dict
 import os
+import asyncio
+import multiprocessing
 import tempfile
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+import aiofiles
 
-# Import your existing services
-from services.qa_service import QAService
-
-# For file processing
-try:
-    from PyPDF2 import PdfReader
-    from docx import Document
-except ImportError:
-    print("⚠️  Warning: Install PyPDF2 and python-docx for full file support")
-    print("   pip install PyPDF2 python-docx")
+# For file processing. Extraction workers import this module too, so the
+# heavy imports (QAService, embeddings, FAISS) live in the startup hook
+from ingestion.extractors import process_uploaded_file
 
 # Initialize FastAPI app
 app = FastAPI(title="QA Service API with File Upload")
@@ -46,13 +43,65 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize QA service once (singleton)
-try:
-    qa_service = QAService()
-    print("✅ QA Service initialized successfully")
-except Exception as e:
-    print(f"❌ Error initializing QA Service: {e}")
-    qa_service = None
+# Uploads are read in 1 MiB pieces and capped per file; files up to
+# 8 MiB stay in memory, bigger ones are streamed to a temp file
+UPLOAD_CHUNK_SIZE = 1 << 20
+IN_MEMORY_MAX_SIZE = 8 << 20
+MAX_UPLOAD_SIZE = 100 << 20
+
+# Created on startup: text extraction is CPU-bound, so it runs in worker processes
+extract_pool = None
+# Initialize QA service once (singleton), on startup
+qa_service = None
+
+
+@app.on_event("startup")
+async def startup():
+    global extract_pool, qa_service
+    # spawn gives the same clean workers on every OS, instead of forking
+    # a process that already runs torch/FAISS threads
+    extract_pool = ProcessPoolExecutor(
+        max_workers=os.cpu_count(),
+        mp_context=multiprocessing.get_context("spawn")
+    )
+    
+    try:
+        from services.qa_service import QAService
+        qa_service = QAService()
+        print("✅ QA Service initialized successfully")
+    except Exception as e:
+        print(f"❌ Error initializing QA Service: {e}")
+        qa_service = None
+
+
+@app.on_event("startup")
+async def warmup():
+    """Run one embedding batch and one search so the first real request doesn't pay the load cost"""
+    if qa_service is None:
+        return
+    try:
+        import numpy as np
+        from ingestion.batcher import count_tokens
+        from services.semcache import best_match
+        
+        embedder = qa_service.vectorstore.embedding_function
+        embedder.embed_documents(["warmup", "warmup batch"])
+        embedder.embed_query("warmup")
+        # loads the tokenizer used for packing embedding batches
+        count_tokens(["warmup"])
+        qa_service.vectorstore.similarity_search("warmup", k=1)
+        # compiles (or loads the cached) numba kernel of the answer cache
+        dim = qa_service.vectorstore.index.d
+        best_match(np.ones(dim, dtype=np.float32), np.ones((2, dim), dtype=np.float32))
+        print("✅ Embedder and vectorstore warmed up")
+    except Exception as e:
+        print(f"⚠️  Warmup failed: {e}")
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    if extract_pool is not None:
+        extract_pool.shutdown(cancel_futures=True)
 
 
 # Request/Response models
@@ -71,54 +120,48 @@ class AnswerResponse(BaseModel):
     question: str
 
 
-# File processing functions
-def extract_text_from_txt(file_path: str) -> str:
-    """Extract text from TXT file"""
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return f.read()
-    except UnicodeDecodeError:
-        # Try different encoding if utf-8 fails
-        with open(file_path, 'r', encoding='latin-1') as f:
-            return f.read()
-
-
-def extract_text_from_pdf(file_path: str) -> str:
-    """Extract text from PDF file"""
-    try:
-        reader = PdfReader(file_path)
-        text = ""
-        for page in reader.pages:
-            text += page.extract_text() + "\n"
-        return text
-    except Exception as e:
-        raise Exception(f"Error reading PDF: {str(e)}")
-
-
-def extract_text_from_docx(file_path: str) -> str:
-    """Extract text from DOCX file"""
+async def receive_upload(file: UploadFile):
+    """
+    Read an upload in UPLOAD_CHUNK_SIZE pieces, capped at MAX_UPLOAD_SIZE
+    
+    Returns:
+        the contents for small files, or the path of a temp file holding
+        them once they pass IN_MEMORY_MAX_SIZE (caller removes it)
+    """
+    buffer = bytearray()
+    temp_path = None
+    out = None
+    size = 0
+    
     try:
-        doc = Document(file_path)
-        text = ""
-        for paragraph in doc.paragraphs:
-            text += paragraph.text + "\n"
-        return text
-    except Exception as e:
-        raise Exception(f"Error reading DOCX: {str(e)}")
-
-
-def process_uploaded_file(file_path: str, filename: str) -> str:
-    """Process uploaded file based on extension"""
-    ext = Path(filename).suffix.lower()
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            size += len(chunk)
+            if size > MAX_UPLOAD_SIZE:
+                raise ValueError(f"File larger than {MAX_UPLOAD_SIZE >> 20} MB")
+            
+            if out is None and size > IN_MEMORY_MAX_SIZE:
+                # too big to keep around, continue on disk
+                fd, temp_path = tempfile.mkstemp(suffix=Path(file.filename).suffix)
+                os.close(fd)
+                out = await aiofiles.open(temp_path, 'wb')
+                await out.write(buffer)
+                buffer = None
+            
+            if out is not None:
+                await out.write(chunk)
+            else:
+                buffer += chunk
+    except Exception:
+        if out is not None:
+            await out.close()
+        if temp_path and os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
     
-    if ext == '.txt':
-        return extract_text_from_txt(file_path)
-    elif ext == '.pdf':
-        return extract_text_from_pdf(file_path)
-    elif ext in ['.docx', '.doc']:
-        return extract_text_from_docx(file_path)
-    else:
-        raise ValueError(f"Unsupported file type: {ext}")
+    if out is not None:
+        await out.close()
+        return temp_path
+    return buffer
 
 
 # API Endpoints
@@ -168,7 +211,8 @@ async def ask_question(request: QuestionRequest):
     
     try:
         # Get answer from QA service
-        answer, docs = qa_service.ask(request.question)
+        # blocking (LLM call, FAISS search), so it runs in a worker thread
+        answer, docs = await asyncio.to_thread(qa_service.ask, request.question)
         
         # Format sources
         sources = []
@@ -220,8 +264,9 @@ async def upload_files(files: List[UploadFile] = File(...)):
     processed_files = []
     errors = []
     
-    # Create temp directory for uploaded files
-    temp_dir = tempfile.mkdtemp()
+    loop = asyncio.get_running_loop()
+    # (filename, extraction future, temp file path or None)
+    extractions = []
     
     try:
         for file in files:
@@ -231,47 +276,42 @@ async def upload_files(files: List[UploadFile] = File(...)):
                 errors.append(f"{file.filename}: Unsupported file type")
                 continue
             
-            # Save uploaded file temporarily
-            temp_file_path = os.path.join(temp_dir, file.filename)
-            
             try:
-                # Save file
-                with open(temp_file_path, 'wb') as f:
-                    content = await file.read()
-                    f.write(content)
-                
-                # Extract text from file
-                text_content = process_uploaded_file(temp_file_path, file.filename)
-                
-                if not text_content.strip():
-                    errors.append(f"{file.filename}: No text content found")
-                    continue
-                
-                # Add to vector store (you'll need to implement this in your QAService)
-                # This assumes your QAService has an add_document method
-                # Modify this based on your actual implementation
-                if hasattr(qa_service, 'add_document'):
-                    qa_service.add_document(text_content, {"source": file.filename})
-                elif hasattr(qa_service, 'vectorstore'):
-                    # Alternative: directly add to vectorstore
-                    from langchain.schema import Document
-                    doc = Document(page_content=text_content, metadata={"source": file.filename})
-                    qa_service.vectorstore.add_documents([doc])
-                else:
-                    raise Exception("QA Service doesn't support adding documents")
-                
-                processed_files.append(file.filename)
-                
+                source = await receive_upload(file)
             except Exception as e:
                 errors.append(f"{file.filename}: {str(e)}")
                 continue
-            finally:
-                # Clean up temp file
-                if os.path.exists(temp_file_path):
-                    os.remove(temp_file_path)
+            
+            # Start extracting this file while the next one is still being read
+            future = loop.run_in_executor(extract_pool, process_uploaded_file, source, file.filename)
+            extractions.append((file.filename, future, source if isinstance(source, str) else None))
         
-        # Clean up temp directory
-        os.rmdir(temp_dir)
+        for filename, future, _ in extractions:
+            try:
+                text_content = await future
+            except Exception as e:
+                errors.append(f"{filename}: {str(e)}")
+                continue
+            
+            if not text_content.strip():
+                errors.append(f"{filename}: No text content found")
+                continue
+            
+            # Embed per file so one failed file doesn't sink the others
+            try:
+                chunks = await asyncio.to_thread(
+                    qa_service.split_document, text_content, {"source": filename}
+                )
+                added = await qa_service.add_documents_async(chunks)
+            except Exception as e:
+                errors.append(f"{filename}: Error adding to vector store: {str(e)}")
+                continue
+            
+            if not added:
+                errors.append(f"{filename}: Already in the vector store")
+                continue
+            
+            processed_files.append(filename)
         
         if not processed_files:
             raise HTTPException(
@@ -291,15 +331,20 @@ async def upload_files(files: List[UploadFile] = File(...)):
         return response
     
     except Exception as e:
-        # Clean up on error
-        if os.path.exists(temp_dir):
-            import shutil
-            shutil.rmtree(temp_dir)
-        
         raise HTTPException(
             status_code=500,
             detail=f"Error processing files: {str(e)}"
         )
+    
+    finally:
+        # Clean up temp files of large uploads
+        for _, future, temp_path in extractions:
+            if temp_path is None:
+                continue
+            if not future.done():
+                await asyncio.wait([future])
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
 
 
 @app.get("/api/stats/")
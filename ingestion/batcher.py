@@ -0,0 +1,74 @@
+# groups chunk texts into embedding requests by token count instead of a
+# fixed number of chunks, and retries requests that hit rate limits
+from transformers import AutoTokenizer
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_exponential_jitter
+from Models.embeddings import MODEL_NAME, MAX_SEQ_LENGTH
+
+MAX_BATCH_TOKENS = 8192
+RETRY_STATUS_CODES = (429, 503)
+
+_tokenizer = None
+
+
+def get_tokenizer():
+    global _tokenizer
+    if _tokenizer is None:
+        _tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
+    return _tokenizer
+
+
+def count_tokens(texts):
+    ids = get_tokenizer()(texts, add_special_tokens=True)['input_ids']
+    # the model truncates longer inputs, so they never cost more than this
+    return [min(len(i), MAX_SEQ_LENGTH) for i in ids]
+
+
+def pack(texts, max_tokens=MAX_BATCH_TOKENS, max_items=None):
+    """
+    Greedily fill batches with texts (in order) up to max_tokens per batch
+
+    Returns:
+        list of batches, each a list of texts
+    """
+    if not texts:
+        return []
+
+    batches = []
+    current, current_tokens = [], 0
+
+    for text, n_tokens in zip(texts, count_tokens(texts)):
+        full = current_tokens + n_tokens > max_tokens or (max_items and len(current) >= max_items)
+        if current and full:
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(text)
+        current_tokens += n_tokens
+
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _is_rate_limited(exc):
+    response = getattr(exc, 'response', None)
+    return getattr(response, 'status_code', None) in RETRY_STATUS_CODES
+
+
+embedding_retry = retry(
+    retry=retry_if_exception(_is_rate_limited),
+    stop=stop_after_attempt(5),
+    wait=wait_exponential_jitter(1, 30),
+    reraise=True,
+)
+
+
+@embedding_retry
+def embed_batch(embedder, texts):
+    """Returns a (len(texts), dim) float32 array"""
+    return embedder.embed_documents_np(texts)
+
+
+@embedding_retry
+async def aembed_batch(embedder, texts):
+    """Returns a (len(texts), dim) float32 array"""
+    return await embedder.aembed_documents_np(texts)
@@ -2,21 +2,30 @@
 # divide into chunks and make embedding and store it into the database
 # so how do we do chunking 
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from ingestion.loader import DocumentLoader
-import os
-from pathlib import Path
+from langchain_core.documents import Document
+
+# Rust-backed splitter, much faster on big documents (optional)
+try:
+    from semantic_text_splitter import TextSplitter
+except ImportError:
+    TextSplitter = None
+
+CHUNK_SIZE = 810
+CHUNK_OVERLAP = 150
 
 splitter = RecursiveCharacterTextSplitter(
-    chunk_size = 810,
-    chunk_overlap = 150,
+    chunk_size = CHUNK_SIZE,
+    chunk_overlap = CHUNK_OVERLAP,
     separators=['\n\n', '\n', '.', ' ', '']
 )
-# path = 'C:\\Users\\uoy\\Desktop\\Document QA System\\test doc.docx'
-# path = 'C:\\Users\\uoy\\Desktop\\Document QA System\\test doc.docx'
-# docs = DocumentLoader.load_file(self = '',file_path=path)
-loader = DocumentLoader()
-docs = loader.load_file(path)
-# splitted_docs = splitter.split_documents(docs)
-splitted_docs = []
+fast_splitter = TextSplitter(CHUNK_SIZE, overlap=CHUNK_OVERLAP) if TextSplitter else None
+
 
-# generate embeddings
+def split_text(text: str, metadata: dict):
+    # uses the fast splitter when installed, same chunk settings either way
+    if fast_splitter is None:
+        return splitter.split_documents([Document(page_content=text, metadata=metadata)])
+    return [
+        Document(page_content=chunk, metadata=dict(metadata))
+        for chunk in fast_splitter.chunks(text)
+    ]
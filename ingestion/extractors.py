@@ -0,0 +1,61 @@
+# text extraction for uploaded files. kept free of heavy imports because
+# it runs inside the upload process pool workers. `source` is either the
+# file contents (bytes) or the path of a temp file for large uploads
+import io
+from pathlib import Path
+
+try:
+    import pymupdf
+    from docx import Document
+except ImportError:
+    print("⚠️  Warning: Install pymupdf and python-docx for full file support")
+    print('   pip install "pymupdf>=1.24.3" python-docx')
+
+
+def extract_text_from_txt(source) -> str:
+    """Extract text from TXT file"""
+    data = Path(source).read_bytes() if isinstance(source, str) else source
+    try:
+        return data.decode('utf-8')
+    except UnicodeDecodeError:
+        # Try different encoding if utf-8 fails
+        return data.decode('latin-1')
+
+
+def extract_text_from_pdf(source) -> str:
+    """Extract text from PDF file"""
+    try:
+        if isinstance(source, str):
+            doc = pymupdf.open(source)
+        else:
+            doc = pymupdf.open(stream=source, filetype="pdf")
+        with doc:
+            return "\n".join(page.get_text("text") for page in doc)
+    except Exception as e:
+        raise Exception(f"Error reading PDF: {str(e)}")
+
+
+def extract_text_from_docx(source) -> str:
+    """Extract text from DOCX file"""
+    try:
+        doc = Document(source if isinstance(source, str) else io.BytesIO(source))
+        text = ""
+        for paragraph in doc.paragraphs:
+            text += paragraph.text + "\n"
+        return text
+    except Exception as e:
+        raise Exception(f"Error reading DOCX: {str(e)}")
+
+
+def process_uploaded_file(source, filename: str) -> str:
+    """Process uploaded file contents based on the filename's extension"""
+    ext = Path(filename).suffix.lower()
+    
+    if ext == '.txt':
+        return extract_text_from_txt(source)
+    elif ext == '.pdf':
+        return extract_text_from_pdf(source)
+    elif ext in ['.docx', '.doc']:
+        return extract_text_from_docx(source)
+    else:
+        raise ValueError(f"Unsupported file type: {ext}")
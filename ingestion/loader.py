@@ -4,25 +4,23 @@ from langchain_community.document_loaders import (
     PyPDFLoader, Docx2txtLoader,TextLoader, WebBaseLoader
 )
 from pathlib import Path
-from Models.llm import get_llm
+
+# loader class for each supported extension
+LOADERS = {
+    '.pdf': PyPDFLoader,
+    '.docx': Docx2txtLoader,
+    '.txt': TextLoader,
+}
 
 class DocumentLoader:
     def load_file(self, file_path:str):
         ext = Path(file_path).suffix.lower()
 
-        if ext == '.pdf':
-            loader = PyPDFLoader(file_path)
-
-        elif ext == '.docx':
-            loader = Docx2txtLoader(file_path)
-
-        elif ext == '.txt':
-            loader = TextLoader(file_path)
-
-        else:
+        loader_cls = LOADERS.get(ext)
+        if loader_cls is None:
             raise ValueError('unsupported file format')
         
-        return loader.load()
+        return loader_cls(file_path).load()
     
 
     def load_url(self, url:str):
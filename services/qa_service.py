@@ -21,29 +21,82 @@
 #         return result, docs
 
 
+import asyncio
+import threading
+from functools import lru_cache
+import numpy as np
 from Models.llm import get_llm
 from retrievers.base import get_retriver
 from chains.rag_chain import build_rag_chain, format_docs
-from langchain_core.documents import Document
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+from ingestion.chunker import split_text
+from ingestion.batcher import pack, embed_batch, aembed_batch
+from vectorstore.store import embedding_cache
+from vectorstore.embedding_cache import text_hash
+from services.semcache import SemanticCache
+
+# max chunk texts per embedding request (batches are also capped by tokens)
+EMBED_BATCH_SIZE = 64
+# max concurrent batch requests to a remote (TEI) embedding server
+EMBED_CONCURRENCY = 8
+# number of chunks retrieved per question
+RETRIEVER_K = 4
+# how many question embeddings to keep in memory
+QUERY_CACHE_SIZE = 1024
+# cosine similarity above which a past question counts as the same question
+SEMANTIC_CACHE_THRESHOLD = 0.92
+# max cached answers before the least recently used one is evicted
+SEMANTIC_CACHE_SIZE = 10_000
 
 class QAService:
 
     def __init__(self):
         self.llm = get_llm()
         # NOW unpacks both retriever and vectorstore
-        self.retriever, self.vectorstore = get_retriver(k=4)
+        self.retriever, self.vectorstore = get_retriver(k=RETRIEVER_K)
         self.chain = build_rag_chain(self.llm)
         
-        # Text splitter for uploads (same settings as your chunker)
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=810,
-            chunk_overlap=150,
-            separators=['\n\n', '\n', '.', ' ', '']
+        # Repeated questions skip the embedding request entirely
+        self._embed_query = lru_cache(maxsize=QUERY_CACHE_SIZE)(self._embed_query_uncached)
+        
+        # Paraphrased questions reuse a past answer instead of calling the LLM
+        self._reset_answer_cache()
+        
+        # (source, chunk text) keys already in the (persisted) index, so
+        # re-uploaded chunks aren't stored twice
+        self._indexed_keys = set(
+            self._chunk_keys(list(self.vectorstore.docstore._dict.values()))
+        )
+        
+        # one upload at a time from "already indexed?" to "added", so two
+        # uploads of the same file can't both add its chunks
+        self._add_lock = asyncio.Lock()
+        # FAISS can't search while vectors are being added from another
+        # thread; also guards the answer cache
+        self._store_lock = threading.Lock()
+
+    def _embed_query_uncached(self, text: str) -> tuple:
+        # tuple so the cached value can't be mutated by callers
+        return tuple(self.vectorstore.embedding_function.embed_query(text))
+
+    def _reset_answer_cache(self):
+        self._answer_cache = SemanticCache(
+            self.vectorstore.index.d,
+            threshold=SEMANTIC_CACHE_THRESHOLD,
+            max_size=SEMANTIC_CACHE_SIZE,
         )
 
     def ask(self, question: str):
-        docs = self.retriever.invoke(question)
+        query_vector = list(self._embed_query(question))
+
+        # the embedder already returns unit vectors, so inner product == cosine
+        vec = np.array(query_vector, dtype=np.float32)
+        with self._store_lock:
+            cached = self._answer_cache.lookup(vec)
+        if cached is not None:
+            return cached
+
+        with self._store_lock:
+            docs = self.vectorstore.similarity_search_by_vector(query_vector, k=RETRIEVER_K)
         context = format_docs(docs)
 
         result = self.chain.invoke({
@@ -51,6 +104,8 @@ class QAService:
             'question': question
         })
 
+        with self._store_lock:
+            self._answer_cache.store(vec, (result, docs))
         return result, docs
     
     def add_document(self, text_content: str, metadata: dict):
@@ -62,16 +117,141 @@ class QAService:
             metadata: dict with 'source' key containing filename
         
         Returns:
-            Number of chunks added
+            Number of chunks added (chunks already in the index are skipped)
         """
-        # Create document
-        doc = Document(page_content=text_content, metadata=metadata)
+        plan = self._prepare_add(self.split_document(text_content, metadata))
+
+        # Embed only the uncached texts, in token-packed batches (one request
+        # per batch instead of one per chunk)
+        embedder = self.vectorstore.embedding_function
+        new_vectors = [embed_batch(embedder, b) for b in plan['batches']]
+        chunks = self._finish_add(plan, new_vectors)
         
-        # Split into chunks (using same settings as ingestion/chunker.py)
-        chunks = self.text_splitter.split_documents([doc])
+        print(f"✅ Added {len(chunks)} chunks from {metadata.get('source', 'unknown')} to FAISS")
+        return len(chunks)
+
+    def _prepare_add(self, chunks):
+        """
+        CPU side of adding chunks before embedding: drop already indexed ones,
+        look up cached vectors and pack the rest into embedding batches
+        """
+        chunks, keys = self._drop_indexed(chunks)
+        hashes = self._chunk_hashes(chunks)
+        cached, misses = self._lookup_embedding_cache(hashes)
+        batches = pack([chunks[i].page_content for i in misses], max_items=EMBED_BATCH_SIZE)
+        return {
+            'chunks': chunks, 'keys': keys, 'hashes': hashes,
+            'cached': cached, 'misses': misses, 'batches': batches,
+        }
+
+    def _finish_add(self, plan, new_vectors):
+        # CPU side after embedding: build the vector array and add it to FAISS
+        chunks = plan['chunks']
+        vectors = self._assemble_vectors(plan['hashes'], plan['cached'], plan['misses'], new_vectors)
+        self._add_vectors(chunks, plan['keys'], vectors)
+        return chunks
+
+    def _chunk_hashes(self, chunks):
+        # embedding cache key: the same text has the same vector in any document
+        model_id = self.vectorstore.embedding_function.model_id
+        return [text_hash(c.page_content, model_id) for c in chunks]
+
+    def _chunk_keys(self, chunks):
+        # index key: the same text in two documents is stored for each source
+        return [(c.metadata.get('source'), c.page_content) for c in chunks]
+
+    def _drop_indexed(self, chunks):
+        # keeps the chunks that aren't in the index yet for their source (once each)
+        new_chunks, new_keys = [], []
+        seen = set()
+        for chunk, key in zip(chunks, self._chunk_keys(chunks)):
+            if key in self._indexed_keys or key in seen:
+                continue
+            seen.add(key)
+            new_chunks.append(chunk)
+            new_keys.append(key)
+        return new_chunks, new_keys
+
+    def _lookup_embedding_cache(self, hashes):
+        # misses are the positions of chunks that still need embedding
+        cached = embedding_cache.get_many(hashes)
+        misses = [i for i, h in enumerate(hashes) if h not in cached]
+        return cached, misses
+
+    def _assemble_vectors(self, hashes, cached, misses, new_vectors):
+        """
+        Build one contiguous (N, dim) float32 array from cached rows and the
+        freshly embedded batches, and remember the new rows for next time
+        """
+        vectors = np.empty((len(hashes), self.vectorstore.index.d), dtype=np.float32)
+        for i, h in enumerate(hashes):
+            if h in cached:
+                vectors[i] = cached[h]
+
+        if misses:
+            fresh = np.vstack(new_vectors)
+            vectors[misses] = fresh
+            embedding_cache.put_many([hashes[i] for i in misses], fresh)
+        return vectors
+
+    def _add_vectors(self, chunks, keys, vectors):
+        # Write straight into the FAISS index and docstore; the chunk
+        # Documents from the splitter are stored as-is
+        store = self.vectorstore
+        with self._store_lock:
+            start = store.index.ntotal
+            store.index.add(vectors)
+
+            ids = [str(start + i) for i in range(len(chunks))]
+            store.docstore._dict.update(zip(ids, chunks))
+            store.index_to_docstore_id.update(enumerate(ids, start))
+            self._indexed_keys.update(keys)
+            
+            # cached answers don't know about the new chunks
+            self._reset_answer_cache()
+
+    def split_document(self, text_content: str, metadata: dict):
+        """
+        Split raw text into chunk Documents with the shared splitter from ingestion/chunker.py
+        """
+        return split_text(text_content, metadata)
+
+    async def add_documents_async(self, chunks):
+        """
+        Embed already split chunks and add them to the FAISS vector store.
+        Hashing, tokenizing, sqlite and FAISS work runs in a worker thread so
+        the event loop stays free (concurrent batch requests for network backends)
         
-        # Add to FAISS vectorstore
-        self.vectorstore.add_documents(chunks)
+        Args:
+            chunks: list of chunk Documents
         
-        print(f"✅ Added {len(chunks)} chunks from {metadata.get('source', 'unknown')} to FAISS")
-        return len(chunks)
\ No newline at end of file
+        Returns:
+            Number of chunks added (chunks already in the index are skipped)
+        """
+        if not chunks:
+            return 0
+
+        embedder = self.vectorstore.embedding_function
+
+        async with self._add_lock:
+            plan = await asyncio.to_thread(self._prepare_add, chunks)
+            batches = plan['batches']
+
+            if getattr(embedder, 'remote', False):
+                # network backend: keep several batch requests in flight
+                semaphore = asyncio.Semaphore(EMBED_CONCURRENCY)
+
+                async def limited_embed(batch):
+                    async with semaphore:
+                        return await aembed_batch(embedder, batch)
+
+                new_vectors = await asyncio.gather(*[limited_embed(b) for b in batches])
+            else:
+                # in-process model already uses every core per batch, so
+                # running batches side by side would only add contention
+                new_vectors = [await aembed_batch(embedder, b) for b in batches]
+
+            chunks = await asyncio.to_thread(self._finish_add, plan, new_vectors)
+
+        print(f"✅ Added {len(chunks)} chunks to FAISS")
+        return len(chunks)
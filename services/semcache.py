@@ -0,0 +1,70 @@
+# semantic answer cache: past question vectors live in one contiguous
+# (M, dim) float32 matrix and a lookup is a single max(C @ q) scan
+import numpy as np
+from numba import njit
+
+
+# compiled to a serial SIMD loop; parallel=True can hang at interpreter exit
+# (TBB threading layer) when called from the worker threads ask() runs on
+@njit(fastmath=True, cache=True)
+def best_match(q, C):
+    scores = np.empty(C.shape[0], dtype=np.float32)
+    for i in range(C.shape[0]):
+        s = np.float32(0.0)
+        for j in range(C.shape[1]):
+            s += C[i, j] * q[j]
+        scores[i] = s
+    best = np.argmax(scores)
+    return best, scores[best]
+
+
+class SemanticCache:
+    """
+    Maps question vectors to (answer, docs). Vectors must be L2-normalized so
+    the dot product is cosine similarity. When full, the least recently used
+    entry is overwritten.
+    """
+
+    def __init__(self, dim: int, threshold: float, max_size: int, initial_capacity: int = 64):
+        self.threshold = threshold
+        self.max_size = max_size
+        self._matrix = np.empty((initial_capacity, dim), dtype=np.float32)
+        self._answers = []
+        self._last_used = []
+        self._clock = 0
+
+    def __len__(self):
+        return len(self._answers)
+
+    def lookup(self, vec):
+        if not self._answers:
+            return None
+
+        q = np.ascontiguousarray(vec, dtype=np.float32).reshape(-1)
+        idx, score = best_match(q, self._matrix[:len(self._answers)])
+        if score < self.threshold:
+            return None
+
+        idx = int(idx)
+        self._clock += 1
+        self._last_used[idx] = self._clock
+        return self._answers[idx]
+
+    def store(self, vec, answer):
+        self._clock += 1
+
+        if len(self._answers) >= self.max_size:
+            slot = int(np.argmin(self._last_used))
+            self._answers[slot] = answer
+            self._last_used[slot] = self._clock
+        else:
+            slot = len(self._answers)
+            if slot == self._matrix.shape[0]:
+                # grow by doubling so rebuilds stay rare
+                grown = np.empty((slot * 2, self._matrix.shape[1]), dtype=np.float32)
+                grown[:slot] = self._matrix
+                self._matrix = grown
+            self._answers.append(answer)
+            self._last_used.append(self._clock)
+
+        self._matrix[slot] = np.asarray(vec, dtype=np.float32).reshape(-1)
@@ -0,0 +1,42 @@
+# sqlite backed map of sha256(embedder id + chunk text) -> embedding, so chunks
+# that were already embedded once (even before a restart) skip the embedder
+import hashlib
+import sqlite3
+import numpy as np
+
+
+def text_hash(text: str, model_id: str) -> str:
+    # the embedder id is part of the key, so backends never share vectors
+    return hashlib.sha256(f"{model_id}\0{text}".encode()).hexdigest()
+
+
+class EmbeddingCache:
+    def __init__(self, path: str):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (hash TEXT PRIMARY KEY, vector BLOB)"
+        )
+        self.conn.commit()
+
+    def get_many(self, hashes):
+        """Returns {hash: vector} for the hashes that are cached"""
+        found = {}
+        unique = list(set(hashes))
+        # stay under sqlite's bound-parameter limit
+        for i in range(0, len(unique), 500):
+            part = unique[i:i + 500]
+            placeholders = ",".join("?" * len(part))
+            rows = self.conn.execute(
+                f"SELECT hash, vector FROM embeddings WHERE hash IN ({placeholders})", part
+            )
+            for h, blob in rows:
+                found[h] = np.frombuffer(blob, dtype=np.float32)
+        return found
+
+    def put_many(self, hashes, vectors):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO embeddings (hash, vector) VALUES (?, ?)",
+            [(h, v.tobytes()) for h, v in zip(hashes, vectors)]
+        )
+        self.conn.commit()
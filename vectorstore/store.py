@@ -1,13 +1,28 @@
 # so before storing it into faiss we need embeddings
+import atexit
+import os
+from pathlib import Path
+import faiss
 from Models.embeddings import get_embeddings
 from langchain_community.vectorstores import FAISS
-from ingestion.chunker import splitted_docs 
-# from langchain_community.docstore.in_memory import InMemoryDocstore
-from Models.embeddings import get_embeddings
+from langchain_community.vectorstores.utils import DistanceStrategy
+from langchain_community.docstore.in_memory import InMemoryDocstore
 from langchain_core.documents import Document
+from vectorstore.embedding_cache import EmbeddingCache
+
+# faiss-gpu build with a visible GPU: search runs on the GPU
+USE_GPU = hasattr(faiss, "StandardGpuResources") and faiss.get_num_gpus() > 0
+
+# HNSW graph gives log-time approximate search and needs no training,
+# so it works with documents arriving one upload at a time. HNSW has no
+# GPU version, so on GPU a brute-force flat scan is used instead
+INDEX_FACTORY = "Flat" if USE_GPU else "HNSW32"
+
+# index + docstore are saved here on shutdown and loaded on startup
+FAISS_DIR = "faiss_store"
+# model_id of the embedder whose vector space the saved index is in
+EMBEDDER_ID_FILE = Path(FAISS_DIR, "embedder_id.txt")
 
-# docs to be embedded
-docs = splitted_docs
 # text = [doc.page_content for doc in docs]
 # embddings = get_embeddings().embed_documents(text)
 embddings = get_embeddings()
@@ -17,8 +32,100 @@ embddings = get_embeddings()
 #       )
 
 
-# Start completely empty
+def to_gpu(cpu_index, resources):
+    # only the index moves to the GPU, the docstore stays on the CPU
+    options = faiss.GpuClonerOptions()
+    options.useFloat16 = True
+    try:
+        return faiss.index_cpu_to_gpu(resources, 0, cpu_index, options), True
+    except RuntimeError as e:
+        print(f"⚠️  Keeping FAISS index on CPU: {e}")
+        return cpu_index, False
+
+
+def is_hnsw(index):
+    return isinstance(faiss.downcast_index(index), faiss.IndexHNSW)
+
+
+def match_index_type(index):
+    """
+    An index saved by a GPU run is flat and one saved by a CPU run is HNSW;
+    copy the vectors into an INDEX_FACTORY index when they don't match this run
+    """
+    wanted = faiss.index_factory(index.d, INDEX_FACTORY, faiss.METRIC_INNER_PRODUCT)
+    if is_hnsw(index) == is_hnsw(wanted):
+        return index
+
+    print(f"🔄 Rebuilding {type(index).__name__} index as {INDEX_FACTORY}")
+    if index.ntotal:
+        # same order, so index_to_docstore_id stays valid
+        wanted.add(index.reconstruct_n(0, index.ntotal))
+    return wanted
+
+
+os.makedirs(FAISS_DIR, exist_ok=True)
+embedding_cache = EmbeddingCache(os.path.join(FAISS_DIR, "embeddings.sqlite"))
+
 dummy_doc = Document(page_content="Placeholder", metadata={"source": "system"})
-vector_store = FAISS.from_documents([dummy_doc], embddings)
+dim = len(embddings.embed_query(dummy_doc.page_content))
+
+if Path(FAISS_DIR, "index.faiss").exists():
+    # our own pickle from a previous run, so deserializing it is safe
+    vector_store = FAISS.load_local(
+        FAISS_DIR,
+        embddings,
+        allow_dangerous_deserialization=True,
+        distance_strategy=DistanceStrategy.MAX_INNER_PRODUCT,
+    )
+    if vector_store.index.d != dim:
+        raise ValueError(
+            f"Index in {FAISS_DIR} has {vector_store.index.d}-dim vectors but the "
+            f"embedder gives {dim}-dim vectors; switch back or delete {FAISS_DIR}"
+        )
+    # same dimension isn't enough, e.g. the local and ONNX models are both 384-d
+    saved_id = EMBEDDER_ID_FILE.read_text().strip() if EMBEDDER_ID_FILE.exists() else None
+    if saved_id is not None and saved_id != embddings.model_id:
+        raise ValueError(
+            f"Index in {FAISS_DIR} was built with {saved_id} but the embedder is "
+            f"{embddings.model_id}; switch back or delete {FAISS_DIR}"
+        )
+    vector_store.index = match_index_type(vector_store.index)
+    print(f"✅ Loaded {vector_store.index.ntotal} vectors from {FAISS_DIR}")
+else:
+    # Start completely empty
+    # vectors are L2-normalized, so inner product == cosine similarity
+    index = faiss.index_factory(dim, INDEX_FACTORY, faiss.METRIC_INNER_PRODUCT)
+    vector_store = FAISS(
+        embedding_function=embddings,
+        index=index,
+        docstore=InMemoryDocstore({}),
+        index_to_docstore_id={},
+        distance_strategy=DistanceStrategy.MAX_INNER_PRODUCT,
+    )
+    vector_store.add_documents([dummy_doc])
+
+index_on_gpu = False
+if USE_GPU:
+    gpu_resources = faiss.StandardGpuResources()
+    vector_store.index, index_on_gpu = to_gpu(vector_store.index, gpu_resources)
+
+
+EMBEDDER_ID_FILE.write_text(embddings.model_id)
+
+
+@atexit.register
+def save_vector_store():
+    if not index_on_gpu:
+        vector_store.save_local(FAISS_DIR)
+        return
+
+    # GPU indexes can't be written directly, save a CPU copy
+    gpu_index = vector_store.index
+    vector_store.index = faiss.index_gpu_to_cpu(gpu_index)
+    try:
+        vector_store.save_local(FAISS_DIR)
+    finally:
+        vector_store.index = gpu_index
+
 
-print("✅ Vectorstore ready for uploads")
\ No newline at end of file
+print("✅ Vectorstore ready for uploads")